@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of request encoding and response decoding.
+
+Compares the precompiled codecs in jules_api.serialization with the
+previous per-call path (``json.dumps(model.dict())`` to encode,
+``Model(**json.loads(body))`` to decode) for every model in
+jules_api/models.py.
+
+Usage:
+  python bench_serialization.py [seconds_per_case]
+"""
+
+import json
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+from jules_api import codec
+from jules_api.models import (
+    GithubRepo,
+    GithubRepoContext,
+    SourceContext,
+    Source,
+    Session,
+    CreateSessionRequest,
+    SendMessageRequest,
+    ListSourcesResponse,
+    ListSessionsResponse,
+    Activity,
+    ListActivitiesResponse,
+)
+
+
+def sample_models():
+    """One representative instance per model."""
+    repo = GithubRepo(owner="octocat", repo="hello-world")
+    repo_context = GithubRepoContext(starting_branch="main")
+    source_context = SourceContext(source="sources/github/octocat/hello-world",
+                                   github_repo_context=repo_context)
+    source = Source(name="sources/github/octocat/hello-world", id="github/octocat/hello-world",
+                    github_repo=repo)
+    session = Session(name="sessions/123", id="123", title="Benchmark session",
+                      source_context=source_context, prompt="Add a README", state="IN_PROGRESS")
+    activity = Activity(name="sessions/123/activities/1", id="1", type="progress",
+                        content="Working on it " * 8,
+                        timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    return [
+        repo,
+        repo_context,
+        source_context,
+        source,
+        session,
+        CreateSessionRequest(prompt="Add a README", source_context=source_context,
+                             title="Benchmark session"),
+        SendMessageRequest(prompt="Please add tests too."),
+        ListSourcesResponse(sources=[source] * 50, next_page_token="token"),
+        ListSessionsResponse(sessions=[session] * 50, next_page_token="token"),
+        activity,
+        ListActivitiesResponse(activities=[activity] * 50, next_page_token="token"),
+    ]
+
+
+def rate(func, seconds):
+    """Calls per second of ``func`` measured over roughly ``seconds``."""
+    calls = 0
+    batch = 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            func()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+        batch *= 2
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    warnings.simplefilter("ignore", DeprecationWarning)  # model.dict() in the baseline
+
+    header = f"{'model':<24}{'encode old/s':>14}{'encode new/s':>14}{'decode old/s':>14}{'decode new/s':>14}"
+    print(header)
+    print("-" * len(header))
+    for instance in sample_models():
+        model = type(instance)
+        model_codec = codec(model)
+        body = model_codec.encode(instance)
+
+        encode_old = rate(lambda: json.dumps(instance.dict(), default=str).encode(), seconds)
+        encode_new = rate(lambda: model_codec.encode(instance), seconds)
+        decode_old = rate(lambda: model(**json.loads(body)), seconds)
+        decode_new = rate(lambda: model_codec.decode(body), seconds)
+        print(f"{model.__name__:<24}{encode_old:>14,.0f}{encode_new:>14,.0f}"
+              f"{decode_old:>14,.0f}{decode_new:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,15 @@ Official Python client library for the Jules API.
 """
 
 from .client import JulesClient, create_client
+from .pool import ApiKeyPool, NoAvailableKeyError
+from .profiler import Profiler
+from .serialization import ModelCodec, codec
+from .shared import MemoryBackend, SQLiteBackend
+from .waiter import CompletionEngine, SessionStateError
 from .models import (
+    ApiKeyConfig,
+    ClientOptions,
+    JulesModel,
     Source,
     GithubRepo,
     GithubRepoContext,
@@ -23,6 +31,18 @@ __version__ = "1.0.1"
 __all__ = [
     "JulesClient",
     "create_client",
+    "ApiKeyPool",
+    "NoAvailableKeyError",
+    "Profiler",
+    "ModelCodec",
+    "codec",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "CompletionEngine",
+    "SessionStateError",
+    "ApiKeyConfig",
+    "ClientOptions",
+    "JulesModel",
     "Source",
     "GithubRepo",
     "GithubRepoContext",
@@ -0,0 +1,302 @@
+"""
+Command line interface for bulk Jules API operations.
+
+Every subcommand writes one JSON object per line to stdout and streams
+page by page, so memory use stays flat however much is exported. Failed
+items are reported as JSON lines on stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Iterable, Iterator, Optional
+
+import requests
+from pydantic import BaseModel
+
+from .client import JulesClient
+from .models import ClientOptions, CreateSessionRequest, SendMessageRequest
+from .pool import NoAvailableKeyError
+
+
+class Checkpoint:
+    """
+    Append-only progress log used to resume an interrupted run.
+
+    Each record names a unit of work (a listing, a session or an input
+    line) with either the page token to continue from or a ``done`` flag.
+    Keys are prefixed with ``namespace`` (the subcommand), so one file
+    reused across subcommands never makes one skip the other's work.
+    """
+
+    def __init__(self, path: Optional[str], namespace: str = ""):
+        self.path = path
+        self.prefix = f"{namespace}:"
+        self.done: set[str] = set()
+        self.tokens: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if not path:
+            return
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:  # torn final line from a killed run
+                        continue
+                    if not record.get("key", "").startswith(self.prefix):
+                        continue
+                    key = record["key"][len(self.prefix):]
+                    if record.get("done"):
+                        self.done.add(key)
+                        self.tokens.pop(key, None)
+                    elif record.get("token"):
+                        self.tokens[key] = record["token"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def save(self, key: str, token: Optional[str] = None, done: bool = False) -> None:
+        """Record progress for ``key``; call only after its output is flushed."""
+        if self._file is None:
+            return
+        key = self.prefix + key
+        record = {"key": key, "done": True} if done else {"key": key, "token": token}
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+
+class Output:
+    """Thread-safe JSON Lines writer."""
+
+    def __init__(self, stream=None, errors=None):
+        self.stream = stream or sys.stdout
+        self.errors = errors or sys.stderr
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def emit(self, items: Iterable[dict]) -> None:
+        data = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items)
+        with self._lock:
+            self.stream.write(data)
+            self.stream.flush()
+
+    def error(self, item: dict, error: Exception) -> None:
+        with self._lock:
+            self.failures += 1
+            self.errors.write(json.dumps({**item, "error": str(error)}) + "\n")
+            self.errors.flush()
+
+
+def _dump(model: BaseModel, **extra) -> dict:
+    return {**extra, **model.model_dump(mode="json", exclude_none=True)}
+
+
+def _export_pages(key: str, fetch: Callable[[Optional[str]], BaseModel], field: str,
+                  out: Output, checkpoint: Checkpoint, **extra) -> None:
+    """Write every page of a listing, checkpointing the token after each page."""
+    if key in checkpoint.done:
+        return
+    token = checkpoint.tokens.get(key)
+    while True:
+        page = fetch(token)
+        out.emit(_dump(item, **extra) for item in getattr(page, field))
+        token = page.next_page_token
+        if not token:
+            checkpoint.save(key, done=True)
+            return
+        checkpoint.save(key, token)
+
+
+def _run_bounded(items: Iterator, worker: Callable, concurrency: int) -> None:
+    """
+    Run ``worker`` over ``items`` with at most ``concurrency`` items in flight.
+
+    An exception raised by a worker stops the run and is re-raised here.
+    """
+    with ThreadPoolExecutor(concurrency) as pool:
+        pending = set()
+        try:
+            for item in items:
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(pool.submit(worker, item))
+            for future in as_completed(pending):
+                future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _is_output_error(error: Exception) -> bool:
+    """True if ``error`` came from writing our own output (e.g. a closed pipe), not from an item."""
+    return isinstance(error, OSError) and not isinstance(error, requests.RequestException)
+
+
+def _read_lines(path: str) -> Iterator[tuple[int, str]]:
+    """Yield ``(line_number, line)`` for each non-blank line of a file ('-' for stdin)."""
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(fh, 1):
+            if line.strip():
+                yield number, line
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def _bulk(args, out: Output, checkpoint: Checkpoint, action: Callable[[dict], Optional[dict]]) -> None:
+    """Apply ``action`` to every input record that the checkpoint has not seen."""
+    def worker(entry):
+        number, line = entry
+        try:
+            record = json.loads(line)
+            result = action(record)
+        except Exception as e:
+            if _is_output_error(e):
+                raise
+            out.error({"line": number}, e)
+            return
+        out.emit([{"line": number, **(result or record)}])
+        checkpoint.save(f"line:{number}", done=True)
+
+    todo = (entry for entry in _read_lines(args.input) if f"line:{entry[0]}" not in checkpoint.done)
+    _run_bounded(todo, worker, args.concurrency)
+
+
+def cmd_sources(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    _export_pages("sources", client.list_sources, "sources", out, checkpoint)
+
+
+def cmd_sessions(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    _export_pages("sessions", lambda token: client.list_sessions(args.page_size, token),
+                  "sessions", out, checkpoint)
+
+
+def cmd_activities(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    def session_ids() -> Iterator[str]:
+        if args.session_ids:
+            yield from args.session_ids
+            return
+        token = None
+        while True:
+            page = client.list_sessions(args.page_size, token)
+            for session in page.sessions:
+                yield session.id
+            token = page.next_page_token
+            if not token:
+                return
+
+    def worker(session_id: str) -> None:
+        try:
+            _export_pages(
+                session_id,
+                lambda token: client.list_activities(session_id, args.page_size, token),
+                "activities", out, checkpoint, session_id=session_id,
+            )
+        except Exception as e:
+            if _is_output_error(e):
+                raise
+            out.error({"session_id": session_id}, e)
+
+    todo = (sid for sid in session_ids() if sid not in checkpoint.done)
+    _run_bounded(todo, worker, args.concurrency)
+
+
+def cmd_create(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    _bulk(args, out, checkpoint,
+          lambda record: _dump(client.create_session(CreateSessionRequest(**record))))
+
+
+def cmd_approve(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    _bulk(args, out, checkpoint, lambda record: client.approve_plan(record["session_id"]))
+
+
+def cmd_message(client: JulesClient, args, out: Output, checkpoint: Checkpoint) -> None:
+    _bulk(args, out, checkpoint, lambda record: client.send_message(
+        record["session_id"], SendMessageRequest(prompt=record["prompt"])))
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="jules-api",
+        description="Bulk operations against the Jules API. Results are written as JSON Lines.",
+    )
+    parser.add_argument("--api-key", action="append", dest="api_keys",
+                        help="API key; repeat to pool several keys "
+                             "(default: $JULES_API_KEY, comma-separated)")
+    parser.add_argument("--base-url", help="API base URL")
+    parser.add_argument("--concurrency", type=_positive_int, default=4,
+                        help="number of requests in flight (default: 4)")
+    parser.add_argument("--rate", type=float,
+                        help="maximum requests per second per key")
+    parser.add_argument("--checkpoint",
+                        help="progress file; rerun with the same file to resume")
+    parser.add_argument("--page-size", type=int, default=100,
+                        help="page size for listings (default: 100)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("sources", help="list all sources").set_defaults(func=cmd_sources)
+    commands.add_parser("sessions", help="list all sessions").set_defaults(func=cmd_sessions)
+    activities = commands.add_parser("activities",
+                                     help="list activities of the given sessions (default: all)")
+    activities.add_argument("session_ids", nargs="*", metavar="SESSION_ID")
+    activities.set_defaults(func=cmd_activities)
+    for name, func, help_text in (
+        ("create", cmd_create, "create a session per CreateSessionRequest line"),
+        ("approve", cmd_approve, 'approve plans for {"session_id": ...} lines'),
+        ("message", cmd_message, 'send {"session_id": ..., "prompt": ...} lines'),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("input", help="JSONL input file, or - for stdin")
+        command.set_defaults(func=func)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for the ``jules-api`` console script."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    keys = args.api_keys or [k for k in os.getenv("JULES_API_KEY", "").split(",") if k]
+    if not keys:
+        parser.error("no API key: pass --api-key or set JULES_API_KEY")
+
+    options = ClientOptions(
+        api_key=keys[0],
+        api_keys=keys[1:] or None,
+        rate_limit=args.rate,
+    )
+    if args.base_url:
+        options.base_url = args.base_url
+    client = JulesClient(options)
+    out = Output()
+    try:
+        checkpoint = Checkpoint(args.checkpoint, namespace=args.command)
+        args.func(client, args, out, checkpoint)
+    except BrokenPipeError:
+        return 1
+    except (requests.RequestException, NoAvailableKeyError, OSError) as e:
+        print(f"jules-api: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 1 if out.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,17 @@
 Jules API Client implementation.
 """
 
+import asyncio
+import time
 import requests
-from typing import Optional
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Sequence, Type, Union
+
+from pydantic import BaseModel
 
 from .models import (
+    ApiKeyConfig,
     ClientOptions,
     Source,
     Session,
@@ -16,6 +23,18 @@ from .models import (
     ListActivitiesResponse,
     Activity,
 )
+from .pool import (
+    ApiKeyPool,
+    NoAvailableKeyError,
+    PooledKey,
+    RESOURCE_FAILURE_STATUSES,
+    is_key_failure,
+    key_fingerprint,
+)
+from .profiler import Profiler, TimedHTTPAdapter, add_time, endpoint_label, start_timing, stop_timing
+from .serialization import M, codec
+from .shared import MemoryBackend, SQLiteBackend
+from .waiter import CompletionEngine, SessionPredicate, state_predicate
 
 
 class JulesClient:
@@ -25,24 +44,199 @@ class JulesClient:
         """
         Initialize the Jules API client.
 
+        When ``options.api_keys`` is set, requests are spread over all keys
+        through an :class:`ApiKeyPool`, and calls scoped to a session stay on
+        the key that owns that session. When ``options.shared_state_path`` is
+        set, the metadata cache and rate-limit buckets are kept in that SQLite
+        file and shared by every process that opens it. When
+        ``options.profile`` is set, ``self.profiler`` records where the time
+        of every request goes.
+
         Args:
             options: Client configuration options
         """
         self.api_key = options.api_key
         self.base_url = options.base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'X-Goog-Api-Key': self.api_key,
-            'Content-Type': 'application/json',
-        })
+        self.cache_ttl = options.cache_ttl
+        self.rate_limit = options.rate_limit
+        if options.shared_state_path:
+            self.backend = SQLiteBackend(options.shared_state_path)
+        else:
+            self.backend = MemoryBackend()
+        headers = {'Content-Type': 'application/json'}
+        self.key_pool: Optional[ApiKeyPool] = None
+        self.session: Optional[requests.Session] = None
+        if options.api_keys:
+            keys = ([options.api_key] if options.api_key else []) + list(options.api_keys)
+            self.key_pool = ApiKeyPool(keys, headers=headers, routing=options.key_routing,
+                                       cooldown=options.key_cooldown, rate_limit=options.rate_limit,
+                                       backend=self.backend, max_wait=options.key_max_wait)
+            sessions = [key.session for key in self.key_pool.keys]
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(headers)
+            self.session.headers['X-Goog-Api-Key'] = self.api_key
+            sessions = [self.session]
+        for session in sessions:
+            session.mount('http://', TimedHTTPAdapter())
+            session.mount('https://', TimedHTTPAdapter())
+        self.profiler: Optional[Profiler] = Profiler() if options.profile else None
+        self._profilers: list[Profiler] = [self.profiler] if self.profiler else []
+        self.waiter = CompletionEngine(self._fetch_session, interval=options.poll_interval)
 
     def _make_request(self, method: str, endpoint: str, params: Optional[dict] = None,
-                     json_data: Optional[dict] = None) -> dict:
-        """Make an HTTP request to the API."""
+                     body: Optional[BaseModel] = None, affinity: Optional[str] = None,
+                     response_model: Optional[Type[M]] = None) -> Optional[M]:
+        """
+        Make an HTTP request to the API.
+
+        ``body`` is encoded and the response decoded with the model's
+        precompiled codec; the response is ignored if ``response_model`` is None.
+        """
         url = f"{self.base_url}{endpoint}"
-        response = self.session.request(method, url, params=params, json=json_data)
+        data = codec(type(body)).encode(body) if body is not None else None
+        if self._profilers:
+            return self._make_profiled_request(method, endpoint, url, params, data, affinity,
+                                               response_model)
+        response, key = self._send(method, url, params, data, affinity)
         response.raise_for_status()
-        return response.json()
+        if response_model is None:
+            return None
+        result = codec(response_model).decode(response.content)
+        self._bind_affinities(result, key)
+        return result
+
+    def _make_profiled_request(self, method: str, endpoint: str, url: str, params: Optional[dict],
+                               data: Optional[bytes], affinity: Optional[str],
+                               response_model: Optional[Type[M]]) -> Optional[M]:
+        """Same as :meth:`_make_request`, timing each phase for the active profilers."""
+        profilers = self._profilers
+        start_timing()
+        try:
+            start = time.perf_counter()
+            response, key = self._send(method, url, params, data, affinity, stream=True)
+            headers_at = time.perf_counter()
+            content = response.content
+            body_at = time.perf_counter()
+        finally:
+            timings = stop_timing()
+        timings['ttfb'] = headers_at - start - timings['queue'] - timings['connect']
+        timings['body'] = body_at - headers_at
+        try:
+            response.raise_for_status()
+            if response_model is None:
+                return None
+            decode_at = time.perf_counter()
+            result = codec(response_model).decode(content)
+            timings['decode'] = time.perf_counter() - decode_at
+            self._bind_affinities(result, key)
+            return result
+        finally:
+            label = endpoint_label(method, endpoint)
+            for profiler in profilers:
+                profiler.record(label, timings)
+
+    def _send(self, method: str, url: str, params: Optional[dict], data: Optional[bytes],
+              affinity: Optional[str], stream: bool = False
+              ) -> tuple[requests.Response, Optional[PooledKey]]:
+        """Send a request on the single key or through the key pool."""
+        if self.key_pool is None:
+            if self.rate_limit:
+                queued_at = time.perf_counter()
+                self._throttle()
+                add_time('queue', time.perf_counter() - queued_at)
+            return self.session.request(method, url, params=params, data=data, stream=stream), None
+        return self._send_pooled(method, url, params, data, affinity, stream)
+
+    def _throttle(self) -> None:
+        """Block until the key's rate-limit bucket has a token."""
+        bucket = key_fingerprint(self.api_key)
+        while True:
+            wait = self.backend.try_acquire(bucket, self.rate_limit)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _cache_get(self, key: str, model: Type[M]) -> Optional[M]:
+        """Return a cached response, if caching is enabled."""
+        if not self.cache_ttl:
+            return None
+        value = self.backend.cache_get(key)
+        return codec(model).from_dict(value) if value is not None else None
+
+    def _cache_put(self, key: str, value: BaseModel) -> None:
+        """Cache a response, if caching is enabled."""
+        if self.cache_ttl:
+            self.backend.cache_set(key, codec(type(value)).to_dict(value), self.cache_ttl)
+
+    def _cache_put_many(self, values: dict[str, BaseModel]) -> None:
+        """Cache several responses in one backend write, if caching is enabled."""
+        if self.cache_ttl and values:
+            self.backend.cache_set_many(
+                {key: codec(type(value)).to_dict(value) for key, value in values.items()},
+                self.cache_ttl)
+
+    def _cache_drop(self, key: str) -> None:
+        """Invalidate a cached response, if caching is enabled."""
+        if self.cache_ttl:
+            self.backend.cache_delete(key)
+
+    def _send_pooled(self, method: str, url: str, params: Optional[dict], data: Optional[bytes],
+                     affinity: Optional[str], stream: bool) -> tuple[requests.Response, PooledKey]:
+        """
+        Send a request through the key pool, failing over between keys.
+
+        Keys that report a credential problem or a quota error cool down and
+        the request moves on. A 403/404 for a session or page the pool has
+        not seen yet is tried on the other keys too, since another key may
+        own it, but it does not count against the key's health.
+        """
+        pinned = self.key_pool.owner(affinity) is not None
+        attempts = 1 if pinned else len(self.key_pool.keys)
+        tried: list[PooledKey] = []
+        previous: Optional[tuple[requests.Response, PooledKey]] = None
+        for attempt in range(attempts):
+            queued_at = time.perf_counter()
+            try:
+                key = self.key_pool.acquire(affinity, exclude=tried)
+            except NoAvailableKeyError:
+                if previous is None:
+                    raise
+                return previous
+            add_time('queue', time.perf_counter() - queued_at)
+            if previous is not None:
+                previous[0].close()
+            try:
+                response = key.session.request(method, url, params=params, data=data,
+                                               stream=stream)
+            except requests.RequestException:
+                # Every key talks to the same host, so transport errors say nothing about the key.
+                self.key_pool.release(key)
+                raise
+            key_failed = is_key_failure(response)
+            self.key_pool.release(key, failed=key_failed, retry_after=_retry_after(response))
+            retry = key_failed or (affinity is not None
+                                   and response.status_code in RESOURCE_FAILURE_STATUSES)
+            if retry and attempt + 1 < attempts:
+                tried.append(key)
+                previous = (response, key)
+                continue
+            return response, key
+
+    def _bind_affinities(self, result: BaseModel, key: Optional[PooledKey]) -> None:
+        """Remember which key owns the sessions and page tokens in a response."""
+        if key is None:
+            return
+        affinities = []
+        token = getattr(result, 'next_page_token', None)
+        if token:
+            affinities.append(token)
+        if isinstance(result, Session):
+            affinities.append(result.id)
+        elif isinstance(result, ListSessionsResponse):
+            affinities.extend(session.id for session in result.sessions)
+        if affinities:
+            self.key_pool.bind_many(affinities, key)
 
     def list_sources(self, next_page_token: Optional[str] = None) -> ListSourcesResponse:
         """
@@ -58,8 +252,10 @@ class JulesClient:
         if next_page_token:
             params['nextPageToken'] = next_page_token
 
-        response = self._make_request('GET', '/sources', params=params)
-        return ListSourcesResponse(**response)
+        response = self._make_request('GET', '/sources', params=params, affinity=next_page_token,
+                                      response_model=ListSourcesResponse)
+        self._cache_put_many({f"source:{source.id}": source for source in response.sources})
+        return response
 
     def create_session(self, request: CreateSessionRequest) -> Session:
         """
@@ -71,8 +267,9 @@ class JulesClient:
         Returns:
             Session: Created session
         """
-        response = self._make_request('POST', '/sessions', json_data=request.dict())
-        return Session(**response)
+        session = self._make_request('POST', '/sessions', body=request, response_model=Session)
+        self._cache_put(f"session:{session.id}", session)
+        return session
 
     def list_sessions(self, page_size: Optional[int] = None,
                      next_page_token: Optional[str] = None) -> ListSessionsResponse:
@@ -92,8 +289,10 @@ class JulesClient:
         if next_page_token:
             params['nextPageToken'] = next_page_token
 
-        response = self._make_request('GET', '/sessions', params=params)
-        return ListSessionsResponse(**response)
+        response = self._make_request('GET', '/sessions', params=params, affinity=next_page_token,
+                                      response_model=ListSessionsResponse)
+        self._cache_put_many({f"session:{session.id}": session for session in response.sessions})
+        return response
 
     def approve_plan(self, session_id: str) -> None:
         """
@@ -102,7 +301,8 @@ class JulesClient:
         Args:
             session_id: The session ID
         """
-        self._make_request('POST', f'/sessions/{session_id}:approvePlan')
+        self._make_request('POST', f'/sessions/{session_id}:approvePlan', affinity=session_id)
+        self._cache_drop(f"session:{session_id}")
 
     def list_activities(self, session_id: str, page_size: Optional[int] = None,
                        next_page_token: Optional[str] = None) -> ListActivitiesResponse:
@@ -123,8 +323,8 @@ class JulesClient:
         if next_page_token:
             params['nextPageToken'] = next_page_token
 
-        response = self._make_request('GET', f'/sessions/{session_id}/activities', params=params)
-        return ListActivitiesResponse(**response)
+        return self._make_request('GET', f'/sessions/{session_id}/activities', params=params,
+                                  affinity=session_id, response_model=ListActivitiesResponse)
 
     def send_message(self, session_id: str, request: SendMessageRequest) -> None:
         """
@@ -135,7 +335,8 @@ class JulesClient:
             request: Message parameters
         """
         self._make_request('POST', f'/sessions/{session_id}:sendMessage',
-                          json_data=request.dict())
+                           body=request, affinity=session_id)
+        self._cache_drop(f"session:{session_id}")
 
     def get_session(self, session_id: str) -> Session:
         """
@@ -147,8 +348,17 @@ class JulesClient:
         Returns:
             Session: Session details
         """
-        response = self._make_request('GET', f'/sessions/{session_id}')
-        return Session(**response)
+        session = self._cache_get(f"session:{session_id}", Session)
+        if session is None:
+            session = self._fetch_session(session_id)
+        return session
+
+    def _fetch_session(self, session_id: str) -> Session:
+        """Fetch a session from the API, bypassing but refreshing the cache."""
+        session = self._make_request('GET', f'/sessions/{session_id}', affinity=session_id,
+                                     response_model=Session)
+        self._cache_put(f"session:{session_id}", session)
+        return session
 
     def get_source(self, source_id: str) -> Source:
         """
@@ -160,22 +370,136 @@ class JulesClient:
         Returns:
             Source: Source details
         """
-        response = self._make_request('GET', f'/sources/{source_id}')
-        return Source(**response)
+        source = self._cache_get(f"source:{source_id}", Source)
+        if source is None:
+            source = self._make_request('GET', f'/sources/{source_id}', response_model=Source)
+            self._cache_put(f"source:{source_id}", source)
+        return source
+
+    @contextmanager
+    def profile(self) -> Iterator[Profiler]:
+        """
+        Profile the requests made inside a ``with`` block.
+
+        Example:
+            with client.profile() as profiler:
+                client.list_sessions()
+            print(profiler.report())
+
+        Yields:
+            Profiler: Collects timings until the block exits
+        """
+        profiler = Profiler()
+        self._profilers = self._profilers + [profiler]
+        try:
+            yield profiler
+        finally:
+            self._profilers = [p for p in self._profilers if p is not profiler]
+
+    def wait_for_future(self, session_id: str,
+                        until: Union[str, Iterable[str], SessionPredicate],
+                        timeout: Optional[float] = None) -> Future:
+        """
+        Wait for a session in the background.
+
+        All waiters share one polling engine, which fetches each watched
+        session once per ``poll_interval``.
+
+        Args:
+            session_id: The session ID
+            until: A state name, a collection of state names, or a predicate on Session
+            timeout: Seconds to wait before failing with TimeoutError (optional)
+
+        Returns:
+            Future: Resolved with the matching Session, or failed with
+            TimeoutError or SessionStateError
+        """
+        return self.waiter.submit(session_id, state_predicate(until), timeout)
+
+    def wait_for(self, session_id: str, until: Union[str, Iterable[str], SessionPredicate],
+                 timeout: Optional[float] = None) -> Session:
+        """
+        Block until a session satisfies ``until``.
+
+        Args:
+            session_id: The session ID
+            until: A state name, a collection of state names, or a predicate on Session
+            timeout: Seconds to wait before raising TimeoutError (optional)
+
+        Returns:
+            Session: The first polled Session that matched
+        """
+        return self.wait_for_future(session_id, until, timeout).result()
+
+    async def wait_for_async(self, session_id: str,
+                             until: Union[str, Iterable[str], SessionPredicate],
+                             timeout: Optional[float] = None) -> Session:
+        """
+        Asynchronous version of :meth:`wait_for`.
+
+        Args:
+            session_id: The session ID
+            until: A state name, a collection of state names, or a predicate on Session
+            timeout: Seconds to wait before raising TimeoutError (optional)
+
+        Returns:
+            Session: The first polled Session that matched
+        """
+        return await asyncio.wrap_future(self.wait_for_future(session_id, until, timeout))
+
+    def await_plan(self, session_id: str, timeout: Optional[float] = None) -> Session:
+        """
+        Block until a session has a plan waiting for approval.
+
+        Args:
+            session_id: The session ID
+            timeout: Seconds to wait before raising TimeoutError (optional)
+
+        Returns:
+            Session: Session in the AWAITING_PLAN_APPROVAL state
+        """
+        return self.wait_for(session_id, "AWAITING_PLAN_APPROVAL", timeout)
+
+    def wait_for_session(self, session_id: str, timeout: Optional[float] = None) -> Session:
+        """
+        Block until a session has completed.
+
+        Args:
+            session_id: The session ID
+            timeout: Seconds to wait before raising TimeoutError (optional)
+
+        Returns:
+            Session: Session in the COMPLETED state
+        """
+        return self.wait_for(session_id, "COMPLETED", timeout)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Parse a numeric ``Retry-After`` header, if present."""
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
 
 
-def create_client(api_key: str, base_url: Optional[str] = None) -> JulesClient:
+def create_client(api_key: Optional[str] = None, base_url: Optional[str] = None,
+                  api_keys: Optional[Sequence[Union[str, ApiKeyConfig]]] = None,
+                  key_routing: str = "least_loaded") -> JulesClient:
     """
     Create a new Jules API client.
 
     Args:
         api_key: Your Jules API key
         base_url: API base URL (optional)
+        api_keys: Additional keys to pool requests across (optional)
+        key_routing: "least_loaded" or "consistent_hash" (optional)
 
     Returns:
         JulesClient: Configured client instance
     """
-    options = ClientOptions(api_key=api_key)
+    options = ClientOptions(api_key=api_key, api_keys=list(api_keys) if api_keys else None,
+                            key_routing=key_routing)
     if base_url:
         options.base_url = base_url
     return JulesClient(options)
@@ -3,45 +3,52 @@ Pydantic models for Jules API.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, model_validator
+from pydantic.alias_generators import to_camel
 
 
-class GithubRepo(BaseModel):
+class JulesModel(BaseModel):
+    """Base for API models: snake_case in Python, camelCase on the wire."""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class GithubRepo(JulesModel):
     """GitHub repository information."""
     owner: str
     repo: str
 
 
-class GithubRepoContext(BaseModel):
+class GithubRepoContext(JulesModel):
     """Additional context for GitHub repositories."""
     starting_branch: Optional[str] = None
 
 
-class SourceContext(BaseModel):
+class SourceContext(JulesModel):
     """Source context for a session."""
     source: str
     github_repo_context: Optional[GithubRepoContext] = None
 
 
-class Source(BaseModel):
+class Source(JulesModel):
     """Represents an input source (e.g., GitHub repository)."""
     name: str
     id: str
     github_repo: Optional[GithubRepo] = None
 
 
-class Session(BaseModel):
+class Session(JulesModel):
     """Represents a continuous unit of work within a specific context."""
     name: str
     id: str
     title: str
     source_context: Optional[SourceContext] = None
     prompt: Optional[str] = None
+    state: Optional[str] = None
 
 
-class CreateSessionRequest(BaseModel):
+class CreateSessionRequest(JulesModel):
     """Request to create a new session."""
     prompt: str
     source_context: SourceContext
@@ -49,24 +56,24 @@ class CreateSessionRequest(BaseModel):
     require_plan_approval: Optional[bool] = False
 
 
-class SendMessageRequest(BaseModel):
+class SendMessageRequest(JulesModel):
     """Request to send a message to the agent."""
     prompt: str
 
 
-class ListSourcesResponse(BaseModel):
+class ListSourcesResponse(JulesModel):
     """Response from listing sources."""
     sources: list[Source]
     next_page_token: Optional[str] = None
 
 
-class ListSessionsResponse(BaseModel):
+class ListSessionsResponse(JulesModel):
     """Response from listing sessions."""
     sessions: list[Session]
     next_page_token: Optional[str] = None
 
 
-class Activity(BaseModel):
+class Activity(JulesModel):
     """Represents a single unit of work within a Session."""
     name: str
     id: str
@@ -75,16 +82,40 @@ class Activity(BaseModel):
     timestamp: Optional[datetime] = None
 
 
-class ListActivitiesResponse(BaseModel):
+class ListActivitiesResponse(JulesModel):
     """Response from listing activities."""
     activities: list[Activity]
     next_page_token: Optional[str] = None
 
 
+class ApiKeyConfig(BaseModel):
+    """Quota settings for a single key in an API key pool."""
+    key: str
+    max_in_flight: Optional[int] = None
+    rate_limit: Optional[float] = None
+
+
 class ClientOptions(BaseModel):
     """Client configuration options."""
-    api_key: str
+    api_key: Optional[str] = None
     base_url: Optional[str] = "https://jules.googleapis.com/v1alpha"
+    api_keys: Optional[list[Union[str, ApiKeyConfig]]] = None
+    key_routing: str = "least_loaded"
+    key_cooldown: float = 30.0
+    key_max_wait: Optional[float] = None
+    poll_interval: float = 5.0
+    rate_limit: Optional[float] = None
+    cache_ttl: float = 0.0
+    shared_state_path: Optional[str] = None
+    profile: bool = False
 
     class Config:
         validate_assignment = True
+
+    @model_validator(mode="after")
+    def _require_key(self) -> "ClientOptions":
+        if not self.api_key and not self.api_keys:
+            raise ValueError("either api_key or api_keys must be provided")
+        if self.key_routing not in ("least_loaded", "consistent_hash"):
+            raise ValueError("key_routing must be 'least_loaded' or 'consistent_hash'")
+        return self
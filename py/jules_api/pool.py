@@ -0,0 +1,260 @@
+"""
+API key pool for spreading requests across multiple credentials.
+"""
+
+import bisect
+import hashlib
+import threading
+import time
+from typing import Collection, Iterable, Optional, Sequence, Union
+
+import requests
+
+from .models import ApiKeyConfig
+from .shared import MemoryBackend
+
+
+# Statuses that always point at the key itself rather than at the request.
+KEY_FAILURE_STATUSES = (401, 429)
+
+# Error reasons that make a 403 about the credential rather than the resource.
+KEY_FAILURE_REASONS = frozenset({
+    "API_KEY_INVALID",
+    "API_KEY_EXPIRED",
+    "API_KEY_SERVICE_BLOCKED",
+    "API_KEY_IP_ADDRESS_BLOCKED",
+    "API_KEY_HTTP_REFERRER_BLOCKED",
+    "SERVICE_DISABLED",
+})
+
+# Statuses that may only mean this key cannot see the requested resource.
+RESOURCE_FAILURE_STATUSES = (403, 404)
+
+# Number of points each key occupies on the consistent hash ring.
+_RING_REPLICAS = 64
+
+# Upper bound on remembered session/page-token owners kept in memory.
+_MAX_AFFINITIES = 100_000
+
+# How long a session/page-token owner is remembered.
+_AFFINITY_TTL = 7 * 24 * 3600.0
+
+
+class NoAvailableKeyError(RuntimeError):
+    """Raised when no key in the pool can serve a request."""
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def is_key_failure(response: requests.Response) -> bool:
+    """True if ``response`` says the key is unusable, not just the resource."""
+    if response.status_code in KEY_FAILURE_STATUSES:
+        return True
+    if response.status_code != 403:
+        return False
+    try:
+        details = response.json()['error'].get('details', [])
+        reasons = {detail.get('reason') for detail in details if isinstance(detail, dict)}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return False
+    return bool(reasons & KEY_FAILURE_REASONS)
+
+
+def key_fingerprint(key: str) -> str:
+    """Short, non-reversible identifier for an API key."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+class PooledKey:
+    """A single API key together with its quota and health state."""
+
+    def __init__(self, config: ApiKeyConfig, headers: dict):
+        self.key = config.key
+        self.fingerprint = key_fingerprint(config.key)
+        self.max_in_flight = config.max_in_flight
+        self.rate_limit = config.rate_limit
+        self.in_flight = 0
+        self.total_requests = 0
+        self.failures = 0
+        self.disabled_until = 0.0
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers['X-Goog-Api-Key'] = config.key
+
+    def available(self, now: float) -> bool:
+        return self.disabled_until <= now
+
+    def has_capacity(self) -> bool:
+        return not self.max_in_flight or self.in_flight < self.max_in_flight
+
+    def load(self) -> float:
+        if self.max_in_flight:
+            return self.in_flight / self.max_in_flight
+        return float(self.in_flight)
+
+
+class ApiKeyPool:
+    """
+    Dispatch requests over several API keys.
+
+    Requests without an affinity go to the least loaded healthy key. Requests
+    carrying an affinity (a session ID or page token) stay on the key that
+    owns it; unknown affinities are placed by consistent hashing when
+    ``routing`` is ``"consistent_hash"``. Keys that fail are taken out of
+    rotation with an exponential cooldown and retried once it expires;
+    requests pinned to such a key wait for it, for at most ``max_wait``
+    seconds if set.
+
+    Per-key rate limits and affinity owners live in ``backend``, so a shared
+    backend gives every process one budget per key.
+    """
+
+    def __init__(self, keys: Sequence[Union[str, ApiKeyConfig]], headers: Optional[dict] = None,
+                 routing: str = "least_loaded", cooldown: float = 30.0, max_cooldown: float = 600.0,
+                 rate_limit: Optional[float] = None, backend=None, max_wait: Optional[float] = None):
+        configs = [k if isinstance(k, ApiKeyConfig) else ApiKeyConfig(key=k) for k in keys]
+        if not configs:
+            raise ValueError("ApiKeyPool requires at least one key")
+        self.keys = [PooledKey(config, headers or {}) for config in configs]
+        for key in self.keys:
+            if key.rate_limit is None:
+                key.rate_limit = rate_limit
+        self._by_fingerprint = {key.fingerprint: key for key in self.keys}
+        self.routing = routing
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_wait = max_wait
+        self.backend = backend if backend is not None else MemoryBackend(_MAX_AFFINITIES)
+        self._ring = sorted(
+            (_hash(f"{key.fingerprint}#{i}"), index)
+            for index, key in enumerate(self.keys)
+            for i in range(_RING_REPLICAS)
+        )
+        self._ring_hashes = [point for point, _ in self._ring]
+        self._cond = threading.Condition()
+
+    def owner(self, affinity: Optional[str]) -> Optional[PooledKey]:
+        """Return the key bound to ``affinity``, if any."""
+        if affinity is None:
+            return None
+        return self._by_fingerprint.get(self.backend.cache_get(f"owner:{affinity}"))
+
+    def bind(self, affinity: str, key: PooledKey) -> None:
+        """Record that ``affinity`` belongs to ``key``."""
+        self.backend.cache_set(f"owner:{affinity}", key.fingerprint, _AFFINITY_TTL)
+
+    def bind_many(self, affinities: Iterable[str], key: PooledKey) -> None:
+        """Record that every one of ``affinities`` belongs to ``key``, in one backend write."""
+        self.backend.cache_set_many({f"owner:{affinity}": key.fingerprint for affinity in affinities},
+                                    _AFFINITY_TTL)
+
+    def _hashed(self, affinity: str, now: float, exclude: Collection[PooledKey]) -> Optional[PooledKey]:
+        start = bisect.bisect(self._ring_hashes, _hash(affinity))
+        for offset in range(len(self._ring)):
+            key = self.keys[self._ring[(start + offset) % len(self._ring)][1]]
+            if key.available(now) and key not in exclude:
+                return key
+        return None
+
+    def _candidates(self, owner: Optional[PooledKey], affinity: Optional[str], now: float,
+                    exclude: Collection[PooledKey] = ()) -> list[PooledKey]:
+        """Keys allowed to serve a request, in order of preference."""
+        if owner is not None:
+            return [owner]
+        if affinity is not None and self.routing == "consistent_hash":
+            key = self._hashed(affinity, now, exclude)
+            return [key] if key else []
+        healthy = [key for key in self.keys if key.available(now) and key not in exclude]
+        return sorted(healthy, key=lambda k: (k.load(), k.total_requests))
+
+    def acquire(self, affinity: Optional[str] = None,
+                exclude: Collection[PooledKey] = ()) -> PooledKey:
+        """
+        Reserve a key for one request, blocking while it is over quota.
+
+        Keys in ``exclude`` (e.g. ones already tried for this request) are skipped.
+        A request pinned to a key that is cooling down waits for it to come back.
+
+        Raises:
+            NoAvailableKeyError: If every eligible key is cooling down, or the
+                key owning ``affinity`` stays down for longer than ``max_wait``
+        """
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        owner = self.owner(affinity)
+        throttled: dict[PooledKey, float] = {}
+        while True:
+            with self._cond:
+                key, wait = self._reserve(owner, affinity, exclude, throttled, deadline)
+                if key is None:
+                    self._cond.wait(wait)
+                    continue
+            if not key.rate_limit:
+                return key
+            # A shared backend may block on other processes, so never call it under _cond.
+            delay = self.backend.try_acquire(key.fingerprint, key.rate_limit)
+            if delay <= 0:
+                return key
+            with self._cond:
+                key.in_flight -= 1
+                key.total_requests -= 1
+                throttled[key] = time.monotonic() + delay
+                self._cond.notify_all()
+
+    def _reserve(self, owner: Optional[PooledKey], affinity: Optional[str],
+                 exclude: Collection[PooledKey], throttled: dict[PooledKey, float],
+                 deadline: Optional[float]) -> tuple[Optional[PooledKey], Optional[float]]:
+        """
+        Claim a slot on the preferred key, or return how long to wait for one.
+
+        Must be called with ``_cond`` held. Keys in ``throttled`` are skipped
+        until their rate-limit bucket refills.
+        """
+        now = time.monotonic()
+        if owner is not None and not owner.available(now):
+            if deadline is not None and owner.disabled_until > deadline:
+                raise NoAvailableKeyError(f"key owning {affinity!r} is cooling down")
+            return None, owner.disabled_until - now
+        candidates = self._candidates(owner, affinity, now, exclude)
+        if not candidates:
+            raise NoAvailableKeyError("all API keys are cooling down")
+        wait = None
+        for key in candidates:
+            ready_at = throttled.get(key, 0.0)
+            if ready_at > now:
+                wait = ready_at - now if wait is None else min(wait, ready_at - now)
+            elif key.has_capacity():
+                key.in_flight += 1
+                key.total_requests += 1
+                return key, None
+        return None, wait
+
+    def release(self, key: PooledKey, failed: bool = False, retry_after: Optional[float] = None) -> None:
+        """Return a key reserved with :meth:`acquire` and record the outcome."""
+        with self._cond:
+            key.in_flight -= 1
+            if failed:
+                key.failures += 1
+                delay = retry_after
+                if delay is None:
+                    delay = min(self.cooldown * 2 ** (key.failures - 1), self.max_cooldown)
+                key.disabled_until = time.monotonic() + delay
+            else:
+                key.failures = 0
+            self._cond.notify_all()
+
+    def stats(self) -> list[dict]:
+        """Snapshot of per-key load and health, keyed by fingerprint."""
+        now = time.monotonic()
+        with self._cond:
+            return [
+                {
+                    'fingerprint': key.fingerprint,
+                    'in_flight': key.in_flight,
+                    'total_requests': key.total_requests,
+                    'failures': key.failures,
+                    'available': key.available(now),
+                }
+                for key in self.keys
+            ]
@@ -0,0 +1,149 @@
+"""
+Per-endpoint request profiling.
+
+A profiled request is split into phases:
+
+- ``queue``: waiting for a rate-limit token or a pooled key
+- ``connect``: DNS lookup, TCP connect and TLS handshake (new connections only)
+- ``ttfb``: sending the request until the response headers arrive
+- ``body``: reading the response body
+- ``decode``: parsing and validating the body into the response model,
+  in the same single pass unprofiled requests use
+"""
+
+import re
+import threading
+import time
+from typing import Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+PHASES = ('queue', 'connect', 'ttfb', 'body', 'decode')
+
+_IDS = re.compile(r'^/(sessions)/[^/:]+|^/(sources)/.+')
+
+_local = threading.local()
+
+
+def endpoint_label(method: str, endpoint: str) -> str:
+    """Group requests by route, e.g. ``GET /sessions/{id}/activities``."""
+    return f"{method} {_IDS.sub(lambda m: f'/{m.group(1) or m.group(2)}/{{id}}', endpoint)}"
+
+
+def start_timing() -> None:
+    """Start collecting connect and queue time on this thread."""
+    _local.times = {'queue': 0.0, 'connect': 0.0}
+
+
+def stop_timing() -> dict:
+    """Stop collecting on this thread and return what was collected."""
+    times = getattr(_local, 'times', None) or {'queue': 0.0, 'connect': 0.0}
+    _local.times = None
+    return times
+
+
+def add_time(phase: str, seconds: float) -> None:
+    """Attribute ``seconds`` to ``phase`` if this thread is being timed."""
+    times = getattr(_local, 'times', None)
+    if times is not None:
+        times[phase] += seconds
+
+
+class _TimedConnect:
+    def connect(self) -> None:
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            add_time('connect', time.perf_counter() - start)
+
+
+class _TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report how long they took to open."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+class Profiler:
+    """Accumulates phase timings per endpoint."""
+
+    def __init__(self):
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, timings: dict) -> None:
+        """Add one request's phase timings (in seconds) under ``endpoint``."""
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = {
+                    'count': 0,
+                    'phases': {phase: [0.0, 0.0] for phase in PHASES},
+                }
+            stats['count'] += 1
+            for phase, seconds in timings.items():
+                totals = stats['phases'][phase]
+                totals[0] += seconds
+                totals[1] = max(totals[1], seconds)
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        with self._lock:
+            self._stats.clear()
+
+    def summary(self) -> dict:
+        """
+        Return ``{endpoint: {'count': n, phase: {'total', 'mean', 'max'}}}``.
+
+        Times are in seconds.
+        """
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._stats.items():
+                count = stats['count']
+                entry: dict = {'count': count}
+                for phase, (total, longest) in stats['phases'].items():
+                    entry[phase] = {'total': total, 'mean': total / count, 'max': longest}
+                result[endpoint] = entry
+            return result
+
+    def report(self, endpoint: Optional[str] = None) -> str:
+        """Format the summary as a table of mean milliseconds per phase."""
+        summary = self.summary()
+        if endpoint is not None:
+            summary = {endpoint: summary[endpoint]} if endpoint in summary else {}
+        title = 'endpoint (mean ms)'
+        width = max([len(title)] + [len(name) for name in summary])
+        lines = [f"{title:<{width}}  {'count':>7}" + "".join(f"{p:>10}" for p in PHASES)]
+        for name, entry in sorted(summary.items(), key=lambda item: -_total(item[1])):
+            lines.append(f"{name:<{width}}  {entry['count']:>7}"
+                         + "".join(f"{entry[p]['mean'] * 1000:>10.2f}" for p in PHASES))
+        return "\n".join(lines)
+
+
+def _total(entry: dict) -> float:
+    return sum(entry[phase]['total'] for phase in PHASES)
@@ -0,0 +1,55 @@
+"""
+Precompiled request encoding and response decoding for API models.
+"""
+
+from typing import Generic, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ModelCodec(Generic[M]):
+    """
+    Encoder and decoder for one model class.
+
+    pydantic-core's compiled serializer and validator are looked up once
+    here instead of on every call. Requests are written straight to JSON
+    bytes with camelCase keys, and responses are parsed and validated from
+    bytes in a single pass.
+    """
+
+    __slots__ = ('model', '_serializer', '_validator')
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self._serializer = model.__pydantic_serializer__
+        self._validator = model.__pydantic_validator__
+
+    def encode(self, instance: M) -> bytes:
+        """Serialize ``instance`` to a JSON request body."""
+        return self._serializer.to_json(instance, by_alias=True, exclude_none=True)
+
+    def decode(self, data: Union[bytes, str]) -> M:
+        """Parse and validate a JSON response body."""
+        return self._validator.validate_json(data)
+
+    def to_dict(self, instance: M) -> dict:
+        """JSON-compatible dict with camelCase keys, as the API would send it."""
+        return self._serializer.to_python(instance, mode='json', by_alias=True, exclude_none=True)
+
+    def from_dict(self, data: dict) -> M:
+        """Validate an already parsed response."""
+        return self._validator.validate_python(data)
+
+
+_codecs: dict = {}
+
+
+def codec(model: Type[M]) -> ModelCodec[M]:
+    """Return the shared codec for ``model``, building it on first use."""
+    try:
+        return _codecs[model]
+    except KeyError:
+        return _codecs.setdefault(model, ModelCodec(model))
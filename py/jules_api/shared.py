@@ -0,0 +1,177 @@
+"""
+Cache and rate-limit state backends.
+
+``MemoryBackend`` keeps state inside the current process. ``SQLiteBackend``
+keeps it in a SQLite file so that every process on a host sharing the file
+sees the same cached metadata and draws from the same token buckets.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class MemoryBackend:
+    """In-process cache and token buckets."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def cache_get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None if missing or expired."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def cache_set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serializable ``value`` for ``ttl`` seconds."""
+        with self._lock:
+            self._cache[key] = (time.time() + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def cache_set_many(self, items: dict[str, Any], ttl: float) -> None:
+        """Store several values for ``ttl`` seconds at once."""
+        with self._lock:
+            expires = time.time() + ttl
+            for key, value in items.items():
+                self._cache[key] = (expires, value)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def cache_delete(self, key: str) -> None:
+        """Drop ``key`` from the cache."""
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def try_acquire(self, bucket: str, rate: float) -> float:
+        """
+        Take one token from a bucket refilled at ``rate`` tokens per second.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        with self._lock:
+            now = time.time()
+            tokens, updated = self._buckets.get(bucket, (max(rate, 1.0), now))
+            tokens, wait = _take(tokens, updated, now, rate)
+            self._buckets[bucket] = (tokens, now)
+            return wait
+
+
+class SQLiteBackend:
+    """
+    Cache and token buckets stored in a SQLite database file.
+
+    Every update runs in an immediate transaction, so concurrent processes
+    never lose each other's writes. Connections are opened per thread and
+    reopened after ``fork()``, which makes it safe to create the client
+    before a prefork server spawns its workers.
+    """
+
+    _purge_every = 1000
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sets = 0
+        with self._transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS cache "
+                       "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS buckets "
+                       "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connection())
+
+    def cache_get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None if missing or expired."""
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cache_set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serializable ``value`` for ``ttl`` seconds."""
+        self.cache_set_many({key: value}, ttl)
+
+    def cache_set_many(self, items: dict[str, Any], ttl: float) -> None:
+        """Store several values for ``ttl`` seconds in one transaction."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                           [(key, json.dumps(value), now + ttl) for key, value in items.items()])
+            purges = self._sets // self._purge_every
+            self._sets += len(items)
+            if self._sets // self._purge_every > purges:
+                db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+
+    def cache_delete(self, key: str) -> None:
+        """Drop ``key`` from the cache."""
+        with self._transaction() as db:
+            db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def try_acquire(self, bucket: str, rate: float) -> float:
+        """
+        Take one token from a bucket refilled at ``rate`` tokens per second.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        with self._transaction() as db:
+            now = time.time()
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE name = ?",
+                             (bucket,)).fetchone()
+            tokens, updated = row if row else (max(rate, 1.0), now)
+            tokens, wait = _take(tokens, updated, now, rate)
+            db.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                       (bucket, tokens, now))
+            return wait
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` around a block, rolling back on error."""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _take(tokens: float, updated: float, now: float, rate: float) -> tuple[float, float]:
+    """Refill a token bucket and try to take one token; returns (tokens, wait)."""
+    tokens = min(max(rate, 1.0), tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
@@ -0,0 +1,185 @@
+"""
+Shared polling engine that resolves session waiters.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, Union
+
+import requests
+
+from .models import Session
+from .pool import NoAvailableKeyError
+
+
+# Session states after which nothing else will happen.
+TERMINAL_STATES = frozenset({"COMPLETED", "FAILED"})
+
+SessionPredicate = Callable[[Session], bool]
+
+
+class SessionStateError(RuntimeError):
+    """Raised when a session ends in a state the waiter was not waiting for."""
+
+    def __init__(self, session: Session):
+        super().__init__(f"session {session.id} ended in state {session.state}")
+        self.session = session
+
+
+def state_predicate(states: Union[str, Iterable[str], SessionPredicate]) -> SessionPredicate:
+    """Turn a state name, a collection of state names or a predicate into a predicate."""
+    if callable(states):
+        return states
+    wanted = frozenset([states] if isinstance(states, str) else states)
+    return lambda session: session.state in wanted
+
+
+class _Waiter:
+    __slots__ = ('predicate', 'future', 'deadline')
+
+    def __init__(self, predicate: SessionPredicate, deadline: Optional[float]):
+        self.predicate = predicate
+        self.future: Future = Future()
+        self.deadline = deadline
+
+
+class CompletionEngine:
+    """
+    Poll sessions on behalf of many waiters.
+
+    Waiters are grouped by session, so a session is fetched at most once per
+    ``interval`` however many waiters are attached to it, and every waiter
+    is resolved from that single fetch. One background thread drives the
+    polling and exits when no waiters are left.
+    """
+
+    def __init__(self, fetch: Callable[[str], Session], interval: float = 5.0,
+                 max_workers: int = 8):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_workers = max_workers
+        self._waiters: dict[str, list[_Waiter]] = {}
+        self._next_poll: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, session_id: str, predicate: SessionPredicate,
+               timeout: Optional[float] = None) -> Future:
+        """Register a waiter and return a future resolved with the matching Session."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        waiter = _Waiter(predicate, deadline)
+        with self._lock:
+            if session_id not in self._waiters:
+                self._waiters[session_id] = []
+                self._next_poll[session_id] = 0.0
+            self._waiters[session_id].append(waiter)
+            # The new waiter may be due or expire before the engine next wakes.
+            self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jules-api-waiter",
+                                                daemon=True)
+                self._thread.start()
+        return waiter.future
+
+    def pending(self) -> int:
+        """Number of unresolved waiters."""
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _run(self) -> None:
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="jules-api-poll") as pool:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    self._expire(now)
+                    if not self._waiters:
+                        self._thread = None
+                        return
+                    due = [sid for sid, at in self._next_poll.items() if at <= now]
+                    for session_id in due:
+                        self._next_poll[session_id] = now + self.interval
+                results = list(zip(due, pool.map(self._fetch, due)))
+                with self._lock:
+                    for session_id, result in results:
+                        self._resolve(session_id, result)
+                    wake_at = min(self._next_poll.values(), default=now)
+                    deadlines = [w.deadline for ws in self._waiters.values() for w in ws
+                                 if w.deadline is not None]
+                    wake_at = min([wake_at] + deadlines)
+                    self._wake.clear()
+                self._wake.wait(max(0.0, wake_at - time.monotonic()))
+
+    def _fetch(self, session_id: str) -> Union[Session, Exception]:
+        try:
+            return self.fetch(session_id)
+        except Exception as e:  # handed to _resolve, which decides whether to retry
+            return e
+
+    def _expire(self, now: float) -> None:
+        for session_id in list(self._waiters):
+            remaining = []
+            for waiter in self._waiters[session_id]:
+                if waiter.future.done():
+                    continue
+                if waiter.deadline is not None and waiter.deadline <= now:
+                    _settle(waiter.future, error=TimeoutError(
+                        f"timed out waiting for session {session_id}"))
+                    continue
+                remaining.append(waiter)
+            self._set_waiters(session_id, remaining)
+
+    def _resolve(self, session_id: str, result: Union[Session, Exception]) -> None:
+        waiters = self._waiters.get(session_id, [])
+        if isinstance(result, Exception):
+            if _is_retryable(result):
+                return
+            for waiter in waiters:
+                _settle(waiter.future, error=result)
+            self._set_waiters(session_id, [])
+            return
+        remaining = []
+        for waiter in waiters:
+            if waiter.future.done():
+                continue
+            try:
+                matched = waiter.predicate(result)
+            except Exception as e:
+                _settle(waiter.future, error=e)
+                continue
+            if matched:
+                _settle(waiter.future, result=result)
+            elif result.state in TERMINAL_STATES:
+                _settle(waiter.future, error=SessionStateError(result))
+            else:
+                remaining.append(waiter)
+        self._set_waiters(session_id, remaining)
+
+    def _set_waiters(self, session_id: str, waiters: list) -> None:
+        if waiters:
+            self._waiters[session_id] = waiters
+        else:
+            self._waiters.pop(session_id, None)
+            self._next_poll.pop(session_id, None)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Transient failures keep the waiters polling; anything else fails them."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.RequestException, NoAvailableKeyError))
+
+
+def _settle(future: Future, result: Optional[Session] = None,
+            error: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except Exception:  # cancelled concurrently by the caller
+        pass
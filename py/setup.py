@@ -44,6 +44,11 @@ setup(
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
     python_requires=">=3.8",
+    entry_points={
+        "console_scripts": [
+            "jules-api=jules_api.cli:main",
+        ],
+    },
     install_requires=[
         "requests>=2.25.0",
         "pydantic>=2.0.0",
@@ -20,6 +20,10 @@ source .venv/bin/activate
 echo "Installing dependencies..."
 pip install -r requirements.txt
 
+# Run the offline tests
+echo "Running offline tests..."
+python3 -m pytest -q test_offline.py
+
 # Run the test
 echo "Running tests..."
 python3 test_api.py
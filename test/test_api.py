@@ -85,6 +85,23 @@ def test_get_session(client, session_id):
         return None
 
 
+def test_wait_for_session(client, session_id):
+    """Test waiting for a session to leave the queue."""
+    print("\n⏱️  Testing: Wait For Session")
+    if not session_id:
+        print("   ⚠️  Skipping: No session ID available")
+        return None
+
+    try:
+        session = client.wait_for(session_id, lambda s: s.state not in (None, "QUEUED"), timeout=120)
+        print("   ✅ Success: Session started")
+        print(f"      State: {session.state}")
+        return session
+    except Exception as e:
+        print(f"   ❌ Failed: {e}")
+        return None
+
+
 def test_list_sessions(client):
     """Test listing sessions endpoint."""
     print("\n📂 Testing: List Sessions")
@@ -186,6 +203,7 @@ def main():
             'list_sources': False,
             'create_session': False,
             'get_session': False,
+            'wait_for_session': False,
             'list_sessions': False,
             'list_activities': False,
             'send_message': False,
@@ -210,6 +228,9 @@ def main():
         # 3. Get session
         test_results['get_session'] = test_get_session(client, session_id) is not None
 
+        # 3b. Wait for the session to start
+        test_results['wait_for_session'] = test_wait_for_session(client, session_id) is not None
+
         # 4. List sessions
         sessions_list = test_list_sessions(client)
         test_results['list_sessions'] = len(sessions_list) >= 0  # Could be empty
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the Python client.
+
+These run against a local stub server, so they need no API key:
+    python -m pytest test_offline.py
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+# Add the parent directory to Python path so we can import jules_api
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py'))
+
+from jules_api import (
+    ApiKeyConfig,
+    ApiKeyPool,
+    ClientOptions,
+    CreateSessionRequest,
+    GithubRepo,
+    GithubRepoContext,
+    JulesClient,
+    MemoryBackend,
+    NoAvailableKeyError,
+    SendMessageRequest,
+    SessionStateError,
+    SourceContext,
+    SQLiteBackend,
+)
+from jules_api import cli
+
+
+class StubServer:
+    """
+    Local HTTP server answering with ``handler(method, path, api_key, body)``.
+
+    The handler returns ``(status, json_body)`` or ``(status, json_body,
+    headers)``; every request is recorded
+    in ``hits`` as ``(method, path, api_key)``.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.hits = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                path = urlparse(self.path).path
+                key = self.headers.get('X-Goog-Api-Key')
+                with stub._lock:
+                    stub.hits.append((self.command, path, key))
+                status, payload, *headers = stub.handler(self.command, path, key, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_POST = _serve
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, path, key=None):
+        with self._lock:
+            return sum(1 for _, p, k in self.hits if p == path and (key is None or k == key))
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(handler):
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def session_json(session_id, state="IN_PROGRESS"):
+    return {'name': f'sessions/{session_id}', 'id': session_id, 'title': 't', 'state': state}
+
+
+def api_error(status, code, reason=None):
+    error = {'code': status, 'status': code, 'message': code}
+    if reason:
+        error['details'] = [{'reason': reason}]
+    return {'error': error}
+
+
+def pooled_client(server, **options):
+    return JulesClient(ClientOptions(base_url=server.url, api_keys=['K1', 'K2'], **options))
+
+
+def test_resource_403_does_not_cool_down_key(stub):
+    def handler(method, path, key, body):
+        if path == '/sessions/forbidden':
+            return (200, session_json('forbidden')) if key == 'K2' \
+                else (403, api_error(403, 'PERMISSION_DENIED'))
+        return 200, {'sources': []}
+
+    server = stub(handler)
+    client = pooled_client(server)
+
+    assert client.get_session('forbidden').id == 'forbidden'
+    assert server.count('/sessions/forbidden', 'K1') == 1
+    assert all(stat['available'] for stat in client.key_pool.stats())
+
+
+def test_credential_403_cools_down_key(stub):
+    def handler(method, path, key, body):
+        if key == 'K1':
+            return 403, api_error(403, 'PERMISSION_DENIED', 'API_KEY_INVALID')
+        return 200, {'sources': []}
+
+    server = stub(handler)
+    client = pooled_client(server)
+    client.key_pool.keys[1].total_requests = 1  # make K1 the first choice
+
+    client.list_sources()
+
+    assert [stat['available'] for stat in client.key_pool.stats()] == [False, True]
+
+
+def test_429_fails_over_and_pinned_session_waits_for_owner(stub):
+    def handler(method, path, key, body):
+        if path.startswith('/sessions'):
+            return 200, session_json(f's-{key}' if method == 'POST' else path.split('/')[2])
+        if key == 'K1':
+            return 429, api_error(429, 'RESOURCE_EXHAUSTED')
+        return 200, {'sources': []}
+
+    server = stub(handler)
+    client = pooled_client(server, key_cooldown=0.3)
+    request = CreateSessionRequest(prompt='p', title='t', source_context=SourceContext(source='s'))
+    owned = client.create_session(request)  # K1 is least loaded, so it owns this session
+    assert owned.id == 's-K1'
+
+    client.key_pool.keys[1].total_requests = 5  # make K1 the first choice again
+    client.list_sources()  # K1 answers 429 and cools down; K2 serves the retry
+    cooled_at = time.monotonic()
+    assert server.count('/sources', 'K2') == 1
+
+    assert client.get_session(owned.id).id == owned.id
+    assert time.monotonic() - cooled_at >= 0.25
+    assert server.count(f'/sessions/{owned.id}', 'K1') == 1
+
+
+def test_pinned_wait_is_capped_by_key_max_wait(stub):
+    def handler(method, path, key, body):
+        if method == 'POST':
+            return 200, session_json(f's-{key}')
+        return 429, api_error(429, 'RESOURCE_EXHAUSTED')
+
+    server = stub(handler)
+    client = pooled_client(server, key_cooldown=30, key_max_wait=1)
+    request = CreateSessionRequest(prompt='p', title='t', source_context=SourceContext(source='s'))
+    owned = client.create_session(request)
+    with pytest.raises(requests.HTTPError):
+        client.get_session(owned.id)  # pinned, so the 429 is not retried elsewhere
+
+    started = time.monotonic()
+    with pytest.raises(NoAvailableKeyError):
+        client.get_session(owned.id)
+    assert time.monotonic() - started < 0.5  # fails fast instead of waiting out the cooldown
+
+
+def test_transport_error_does_not_cool_down_key(stub):
+    server = stub(lambda *args: (200, {'sources': []}))
+    url = server.url
+    server.close()
+    client = JulesClient(ClientOptions(base_url=url, api_keys=['K1', 'K2']))
+
+    with pytest.raises(requests.ConnectionError):
+        client.list_sources()
+    assert all(stat['available'] for stat in client.key_pool.stats())
+
+
+def test_session_calls_and_pages_stay_on_the_owning_key(stub):
+    def handler(method, path, key, body):
+        if path == '/sessions' and method == 'POST':
+            return 200, session_json(f's-{key}')
+        if path.endswith('/activities'):
+            return 200, {'activities': [], 'nextPageToken': f'next-{key}'}
+        return 200, session_json(path.split('/')[2])
+
+    server = stub(handler)
+    client = pooled_client(server)
+    request = CreateSessionRequest(prompt='p', title='t', source_context=SourceContext(source='s'))
+    session = client.create_session(request)
+    owner = session.id[2:]
+    client.key_pool.keys[0 if owner == 'K1' else 1].total_requests = 100  # owner is busiest
+
+    client.get_session(session.id)
+    page = client.list_activities(session.id)
+    client.list_activities(session.id, next_page_token=page.next_page_token)
+    client.send_message(session.id, SendMessageRequest(prompt='p'))
+    client.approve_plan(session.id)
+
+    session_hits = [k for _, p, k in server.hits if p.startswith(f'/sessions/{session.id}')]
+    assert len(session_hits) == 5 and set(session_hits) == {owner}
+    assert page.next_page_token == f'next-{owner}'
+
+
+def test_consistent_hash_places_unknown_sessions_stably():
+    pools = [ApiKeyPool(['K1', 'K2', 'K3'], routing='consistent_hash') for _ in range(2)]
+    for session_id in (f'session-{i}' for i in range(20)):
+        placed = []
+        for pool in pools:
+            key = pool.acquire(session_id)
+            pool.release(key)
+            placed.append(key.fingerprint)
+        assert placed[0] == placed[1]
+
+
+def test_cooldown_expires_and_backs_off():
+    pool = ApiKeyPool(['K1'], cooldown=0.1)
+    key = pool.acquire()
+    pool.release(key, failed=True)
+    with pytest.raises(NoAvailableKeyError):
+        pool.acquire()
+    time.sleep(0.15)
+    key = pool.acquire()  # back in rotation
+    pool.release(key, failed=True)  # second failure in a row: 0.2s
+    time.sleep(0.15)
+    with pytest.raises(NoAvailableKeyError):
+        pool.acquire()
+    time.sleep(0.1)
+    pool.release(pool.acquire())
+    assert pool.stats()[0]['failures'] == 0
+
+
+def test_short_timeout_on_watched_session_expires_on_time(stub):
+    server = stub(lambda method, path, key, body: (200, session_json('s')))
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url, poll_interval=5))
+
+    long_wait = client.wait_for_future('s', 'COMPLETED', timeout=30)
+    while server.count('/sessions/s') == 0:  # let the engine poll once and go to sleep
+        time.sleep(0.01)
+    time.sleep(0.1)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.wait_for('s', 'COMPLETED', timeout=0.5)
+    assert time.monotonic() - started < 2
+    long_wait.cancel()
+
+
+def test_waiter_raises_when_session_ends_in_another_state(stub):
+    server = stub(lambda method, path, key, body: (200, session_json('s', 'FAILED')))
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url, poll_interval=0.05))
+
+    with pytest.raises(SessionStateError) as excinfo:
+        client.wait_for('s', 'COMPLETED', timeout=2)
+    assert excinfo.value.session.state == 'FAILED'
+
+
+def test_many_waiters_share_one_fetch_per_poll(stub):
+    def handler(method, path, key, body):
+        state = 'COMPLETED' if server.count('/sessions/s') > 3 else 'IN_PROGRESS'
+        return 200, session_json('s', state)
+
+    server = stub(handler)
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url, poll_interval=0.05))
+
+    futures = [client.wait_for_future('s', 'COMPLETED', timeout=5) for _ in range(1000)]
+    session = asyncio.run(client.wait_for_async('s', {'COMPLETED', 'FAILED'}, timeout=5))
+
+    assert session.state == 'COMPLETED'
+    assert all(future.result(timeout=1).state == 'COMPLETED' for future in futures)
+    assert server.count('/sessions/s') <= 6  # one fetch per poll, not per waiter
+
+
+def test_waiters_bypass_the_metadata_cache(stub):
+    polls = []
+
+    def handler(method, path, key, body):
+        polls.append(path)
+        return 200, session_json('q', 'COMPLETED' if len(polls) >= 3 else 'IN_PROGRESS')
+
+    server = stub(handler)
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url,
+                                       cache_ttl=60, poll_interval=0.05))
+    assert client.get_session('q').state == 'IN_PROGRESS'  # now cached for a minute
+
+    assert client.wait_for('q', 'COMPLETED', timeout=2).state == 'COMPLETED'
+    assert client.get_session('q').state == 'COMPLETED'  # the poll refreshed the cache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / 'state.sqlite'))
+
+
+def test_token_bucket_allows_a_burst_then_paces(backend):
+    assert [backend.try_acquire('k', 2.0) for _ in range(2)] == [0, 0]
+    wait = backend.try_acquire('k', 2.0)
+    assert 0.4 < wait <= 0.5
+    assert backend.try_acquire('other', 2.0) == 0  # buckets are independent
+    time.sleep(wait)
+    assert backend.try_acquire('k', 2.0) == 0
+
+
+def test_sqlite_backend_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+    first.cache_set('session', {'id': 's'}, ttl=60)
+    assert second.cache_get('session') == {'id': 's'}
+    second.cache_delete('session')
+    assert first.cache_get('session') is None
+
+    assert first.try_acquire('k', 1.0) == 0
+    assert second.try_acquire('k', 1.0) > 0  # one budget for both
+
+
+def test_pool_does_not_hold_its_lock_during_backend_calls():
+    class SlowBackend(MemoryBackend):
+        entered = threading.Event()
+        release = threading.Event()
+
+        def try_acquire(self, bucket, rate):
+            self.entered.set()
+            self.release.wait(5)  # e.g. another process holding the SQLite write lock
+            return super().try_acquire(bucket, rate)
+
+    pool = ApiKeyPool([ApiKeyConfig(key='K1', rate_limit=10.0), 'K2'], backend=SlowBackend())
+    stuck = threading.Thread(target=pool.acquire)
+    stuck.start()
+    assert SlowBackend.entered.wait(5)  # K1's bucket is being checked
+
+    started = time.monotonic()
+    assert pool.acquire().key == 'K2'
+    assert time.monotonic() - started < 1
+    SlowBackend.release.set()
+    stuck.join()
+
+
+def test_listing_binds_and_caches_a_page_in_one_transaction(stub, tmp_path):
+    class CountingBackend(SQLiteBackend):
+        transactions = 0
+
+        def _transaction(self):
+            CountingBackend.transactions += 1
+            return super()._transaction()
+
+    server = stub(lambda method, path, key, body: (200, {
+        'sessions': [session_json(f's{i}') for i in range(100)], 'nextPageToken': 'next'}))
+    client = pooled_client(server, cache_ttl=60)
+    client.backend = client.key_pool.backend = CountingBackend(str(tmp_path / 'state.sqlite'))
+    CountingBackend.transactions = 0
+
+    client.list_sessions(page_size=100)
+
+    assert CountingBackend.transactions == 2  # owners of the page, then the cached sessions
+    assert client.key_pool.owner('s99') is client.key_pool.owner('next') is not None
+    assert client.get_session('s42').id == 's42'
+    assert server.count('/sessions/s42') == 0
+
+
+def test_rate_limited_pool_spreads_then_paces():
+    pool = ApiKeyPool([ApiKeyConfig(key='K1', rate_limit=2.0), ApiKeyConfig(key='K2', rate_limit=2.0)])
+    started = time.monotonic()
+    used = []
+    for _ in range(5):
+        key = pool.acquire()
+        used.append(key.key)
+        pool.release(key)
+    assert sorted(used[:4]) == ['K1', 'K1', 'K2', 'K2']  # both bursts before waiting
+    assert 0.4 < time.monotonic() - started < 1
+
+
+def run_cli(server, *args):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        code = cli.main(['--api-key', 'K', '--base-url', server.url, *args])
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def test_cli_reports_missing_input_file(stub):
+    server = stub(lambda *args: (200, {}))
+    code, out, err = run_cli(server, 'create', '/nonexistent.jsonl')
+    assert code == 1
+    assert err.startswith('jules-api:') and 'Traceback' not in err
+
+
+def test_cli_export_survives_a_429_on_one_session(stub):
+    def handler(method, path, key, body):
+        if path == '/sessions':
+            if server.count('/sessions') == 1:
+                return 200, {'sessions': [session_json('s1'), session_json('s2')],
+                             'nextPageToken': 'page2'}
+            return 200, {'sessions': [session_json('s3')]}
+        if path == '/sessions/s1/activities':
+            return 429, api_error(429, 'RESOURCE_EXHAUSTED'), {'Retry-After': '0.3'}
+        return 200, {'activities': [{'name': 'a', 'id': '1', 'type': 'progress'}]}
+
+    server = stub(handler)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        # s1's 429 cools down the key that owns s2 and page 2; they wait for it.
+        code = cli.main(['--api-key', 'K1', '--api-key', 'K2', '--base-url', server.url,
+                         '--concurrency', '1', 'activities'])
+    assert code == 1  # s1 failed
+    exported = [json.loads(line)['session_id'] for line in stdout.getvalue().splitlines()]
+    assert exported == ['s2', 's3']
+    assert '"s1"' in stderr.getvalue() and 'Traceback' not in stderr.getvalue()
+
+
+def test_cli_checkpoint_resumes_and_is_scoped_per_command(stub, tmp_path):
+    def handler(method, path, key, body):
+        if path == '/sessions' and method == 'GET':
+            return 200, {'sessions': [session_json('s1')]}
+        if path == '/sessions/s1/activities':
+            return 200, {'activities': [{'name': 'a', 'id': '1', 'type': 'progress'}]}
+        if method == 'POST':
+            return 200, {}
+        return 404, {}
+
+    server = stub(handler)
+    checkpoint = str(tmp_path / 'progress.ckpt')
+    requests_file = tmp_path / 'approve.jsonl'
+    requests_file.write_text('{"session_id": "s1"}\n{"session_id": "s2"}\n')
+    messages_file = tmp_path / 'message.jsonl'
+    messages_file.write_text('{"session_id": "s1", "prompt": "p"}\n'
+                             '{"session_id": "s2", "prompt": "p"}\n')
+
+    assert run_cli(server, '--checkpoint', checkpoint, 'approve', str(requests_file))[0] == 0
+    assert run_cli(server, '--checkpoint', checkpoint, 'approve', str(requests_file))[1] == ''
+
+    # The same file must not make other subcommands skip work.
+    code, out, _ = run_cli(server, '--checkpoint', checkpoint, 'message', str(messages_file))
+    assert code == 0 and len(out.splitlines()) == 2
+    code, out, _ = run_cli(server, '--checkpoint', checkpoint, 'sessions')
+    assert code == 0 and json.loads(out)['id'] == 's1'
+    code, out, _ = run_cli(server, '--checkpoint', checkpoint, 'activities')
+    assert code == 0 and json.loads(out)['session_id'] == 's1'
+    assert run_cli(server, '--checkpoint', checkpoint, 'activities')[1] == ''
+
+
+class ClosedPipe(io.StringIO):
+    """stdout of a consumer that went away, e.g. ``jules-api ... | head``."""
+
+    def write(self, data):
+        raise BrokenPipeError(32, 'Broken pipe')
+
+
+def test_cli_stops_when_stdout_is_closed(stub, tmp_path):
+    def handler(method, path, key, body):
+        if path == '/sessions':
+            return 200, {'sessions': [session_json(f's{i}') for i in range(20)]}
+        if path.endswith('/activities'):
+            return 200, {'activities': [{'name': 'a', 'id': '1', 'type': 'progress'}]}
+        return 200, {}
+
+    server = stub(handler)
+    checkpoint = str(tmp_path / 'progress.ckpt')
+    requests_file = tmp_path / 'approve.jsonl'
+    requests_file.write_text('{"session_id": "s1"}\n' * 20)
+    stderr = io.StringIO()
+    for command in (['activities'], ['approve', str(requests_file)]):
+        with contextlib.redirect_stdout(ClosedPipe()), contextlib.redirect_stderr(stderr):
+            code = cli.main(['--api-key', 'K', '--base-url', server.url, '--concurrency', '2',
+                             '--checkpoint', checkpoint, *command])
+        assert code == 1
+
+    assert stderr.getvalue() == ''  # no per-item errors for the broken pipe
+    assert server.count('/sessions/s19/activities') == 0
+    assert server.count('/sessions/s1:approvePlan') < 20
+    with open(checkpoint) as fh:
+        assert fh.read() == ''  # nothing was written, so nothing is marked done
+
+
+@pytest.mark.parametrize('value', ['0', '-1', 'many'])
+def test_cli_rejects_bad_concurrency(value):
+    with contextlib.redirect_stderr(io.StringIO()) as stderr, pytest.raises(SystemExit) as exit:
+        cli.main(['--api-key', 'K', '--concurrency', value, 'sources'])
+    assert exit.value.code == 2
+    assert '--concurrency' in stderr.getvalue()
+
+
+def test_request_bodies_use_camel_case_on_the_wire(stub):
+    bodies = {}
+
+    def handler(method, path, key, body):
+        bodies[path] = body
+        return 200, session_json('s') if path == '/sessions' else {}
+
+    server = stub(handler)
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url))
+    client.create_session(CreateSessionRequest(
+        prompt='p', title='t', require_plan_approval=True,
+        source_context=SourceContext(source='sources/s',
+                                     github_repo_context=GithubRepoContext(starting_branch='main'))))
+    client.send_message('s', SendMessageRequest(prompt='hello'))
+
+    assert bodies['/sessions'] == {
+        'prompt': 'p',
+        'title': 't',
+        'requirePlanApproval': True,
+        'sourceContext': {'source': 'sources/s', 'githubRepoContext': {'startingBranch': 'main'}},
+    }
+    assert bodies['/sessions/s:sendMessage'] == {'prompt': 'hello'}
+
+
+def test_camel_case_responses_decode_into_snake_case_fields(stub):
+    server = stub(lambda method, path, key, body: (200, {
+        'sources': [{'name': 'sources/github/o/r', 'id': 'github/o/r',
+                     'githubRepo': {'owner': 'o', 'repo': 'r'}}],
+        'nextPageToken': 'next',
+    }))
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url))
+
+    page = client.list_sources()
+
+    assert page.next_page_token == 'next'
+    assert page.sources[0].github_repo == GithubRepo(owner='o', repo='r')
+
+
+def test_profiler_records_each_phase_per_route(stub):
+    server = stub(lambda method, path, key, body: (200, session_json(path.rsplit('/', 1)[1])))
+    client = JulesClient(ClientOptions(api_key='K', base_url=server.url))
+
+    with client.profile() as profiler:
+        client.get_session('a')
+        client.get_session('b')
+
+    summary = profiler.summary()
+    assert list(summary) == ['GET /sessions/{id}']
+    entry = summary['GET /sessions/{id}']
+    assert entry['count'] == 2
+    assert set(entry) == {'count', 'queue', 'connect', 'ttfb', 'body', 'decode'}
+    assert entry['connect']['total'] > 0 and entry['decode']['total'] > 0